@@ -1,18 +1,91 @@
+import asyncio
 import datetime
 import logging
 import os
 import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import google_auth_httplib2
 from google.oauth2.credentials import Credentials
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Credentials and the Calendar service are built once per process and reused
+# across requests; the lock guards their lazy initialization and token refresh.
+_creds = None
+_service = None
+_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+
+# The service's own httplib2.Http is not thread-safe and the API calls run in worker
+# threads, so every thread executes its requests over its own authorized connection
+_thread_http = threading.local()
+
+# Caps concurrent outbound Calendar API calls to stay clear of rate limits
+_api_semaphore = asyncio.Semaphore(settings.google_api_max_concurrency)
+
+# Short-lived availability cache keyed by (calendar_id, search_days). The lock makes
+# concurrent page loads share a single upstream lookup; the generation counter keeps a
+# lookup that raced with a booking from repopulating the cache with stale slots.
+_slots_cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+_slots_lock = asyncio.Lock()
+_slots_generation = 0
+
 def get_credentials():
+    global _creds, _refresh_thread
+    with _lock:
+        if _creds is None:
+            _creds = _build_credentials()
+        if _creds is None:
+            return None
+
+        state = _token_state(_creds)
+        if state == 'expired':
+            # Wait for an in-flight background refresh rather than issuing a second one
+            if _refresh_thread is not None and _refresh_thread.is_alive():
+                _refresh_thread.join()
+            if not _creds.valid:
+                try:
+                    _creds.refresh(Request())
+                except Exception as e:
+                    logger.error(f"Failed to refresh Google API credentials: {e}")
+                    return None
+        elif state == 'stale' and (_refresh_thread is None or not _refresh_thread.is_alive()):
+            # The token still works: hand it out and refresh off the request path
+            _refresh_thread = threading.Thread(target=_refresh_credentials, args=(_creds,), daemon=True)
+            _refresh_thread.start()
+        return _creds
+
+def _token_state(creds):
+    """
+    Classifies the access token as 'fresh', 'stale' (usable, but close to expiry) or 'expired'.
+    """
+    # google-auth already reports tokens within its own refresh threshold as invalid
+    if not creds.valid:
+        return 'expired'
+    if creds.expiry is None:
+        return 'fresh'
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    if creds.expiry - now < datetime.timedelta(minutes=settings.google_token_refresh_margin_minutes):
+        return 'stale'
+    return 'fresh'
+
+def _refresh_credentials(creds):
+    try:
+        creds.refresh(Request())
+    except Exception as e:
+        logger.error(f"Background refresh of Google API credentials failed: {e}")
+
+def _build_credentials():
 # Try individual environment variables for OAuth credentials
     client_id = os.getenv(settings.google_client_id_env)
     client_secret = os.getenv(settings.google_client_secret_env)
@@ -20,7 +93,7 @@ def get_credentials():
     
     if client_id and client_secret and refresh_token:
         try:
-            creds = Credentials(
+            return Credentials(
                 token=None,
                 refresh_token=refresh_token,
                 id_token=None,
@@ -29,10 +102,6 @@ def get_credentials():
                 client_secret=client_secret,
                 scopes=settings.google_calendar_scopes
             )
-            # Refresh the token if needed
-            if not creds.valid:
-                creds.refresh(Request())
-            return creds
         except Exception as e:
             logger.error(f"Failed to create credentials from environment variables: {e}")
     
@@ -42,18 +111,83 @@ def get_credentials():
                 f"and {settings.google_refresh_token_env}.")
     return None
 
-def find_available_slots():
+def _get_service():
     """
-    Finds available 'interview block' slots in the calendar for the next 7 days.
+    Returns the cached Calendar service, building it on first use.
     """
+    global _service
     creds = get_credentials()
     if not creds:
-        return []
+        return None
+
+    with _lock:
+        if _service is None:
+            # Use the discovery document shipped with googleapiclient instead of fetching it
+            _service = build('calendar', 'v3', credentials=creds, cache_discovery=False, static_discovery=True)
+        return _service
+
+def _get_http():
+    """
+    Returns the calling thread's authorized HTTP object, creating it on first use, or None without credentials.
+    """
+    creds = get_credentials()
+    if not creds:
+        return None
+
+    http = getattr(_thread_http, 'http', None)
+    if http is None or http.credentials is not creds:
+        # build_http sets googleapiclient's default socket timeout, so a stalled connection cannot hang the thread
+        http = _thread_http.http = google_auth_httplib2.AuthorizedHttp(creds, http=build_http())
+    return http
+
+async def warm_up_calendar_service():
+    """
+    Builds the Calendar service and fetches an access token ahead of the first scheduling request.
+    """
+    await asyncio.to_thread(_get_service)
+
+async def find_available_slots():
+    """
+    Finds available 'interview block' slots in the calendar for the next 7 days.
+    """
+    key = (settings.google_calendar_id, settings.calendar_search_days)
+    async with _slots_lock:
+        cached = _slots_cache.get(key)
+        if cached and time.monotonic() - cached[0] < settings.calendar_availability_cache_seconds:
+            return cached[1]
+
+        generation = _slots_generation
+        # googleapiclient is blocking, so keep its HTTP round-trips off the event loop
+        async with _api_semaphore:
+            slots = await asyncio.to_thread(_find_available_slots)
+        if slots is None:
+            # Failed lookups are not cached, so the next request tries again
+            return []
+        if generation == _slots_generation:
+            _slots_cache[key] = (time.monotonic(), slots)
+        return slots
+
+def invalidate_availability_cache():
+    """
+    Drops cached availability so the next lookup reflects newly booked events.
+    """
+    global _slots_generation
+    _slots_generation += 1
+    _slots_cache.clear()
+
+def _find_available_slots():
+    """
+    Looks up the interview slots; returns None if the calendar could not be queried.
+    """
+    service = _get_service()
+    http = _get_http()
+    if not service or not http:
+        return None
         
     try:
-        service = build('calendar', 'v3', credentials=creds)
-        now = datetime.datetime.utcnow().isoformat() + 'Z'
-        time_max = (datetime.datetime.utcnow() + datetime.timedelta(days=settings.calendar_search_days)).isoformat() + 'Z'
+        now_dt = datetime.datetime.now(datetime.timezone.utc)
+        now = now_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        time_max = (now_dt + datetime.timedelta(days=settings.calendar_search_days)).strftime('%Y-%m-%dT%H:%M:%SZ')
 
         events_result = service.events().list(
             calendarId=settings.google_calendar_id,
@@ -61,8 +195,11 @@ def find_available_slots():
             timeMax=time_max,
             q=settings.interview_search_query,
             singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+            orderBy='startTime',
+            maxResults=settings.calendar_max_results,
+            # Only the start of each event is used, so ask for nothing else
+            fields='items(start)'
+        ).execute(http=http)
         
         events = events_result.get('items', [])
         
@@ -74,24 +211,81 @@ def find_available_slots():
 
     except HttpError as e:
         logger.error(f"An error occurred with Google Calendar API: {e}")
-        return []
+        return None
 
-def create_interview_event(start_time_str, candidate_email, candidate_name, duration_hours=None):
+async def create_interview_event(start_time_str, candidate_email, candidate_name, duration_hours=None):
     """
     Creates an interview event in the Google Calendar.
     """
-    creds = get_credentials()
-    if not creds:
+    async with _api_semaphore:
+        created_event = await asyncio.to_thread(
+            _create_interview_event, start_time_str, candidate_email, candidate_name, duration_hours
+        )
+    invalidate_availability_cache()
+    return created_event
+
+def _create_interview_event(start_time_str, candidate_email, candidate_name, duration_hours):
+    service = _get_service()
+    http = _get_http()
+    if not service or not http:
         raise ConnectionError("Could not obtain Google API credentials.")
 
-    service = build('calendar', 'v3', credentials=creds)
-    
+    event = _build_event_body(start_time_str, candidate_email, candidate_name, duration_hours)
+
+    try:
+        created_event = service.events().insert(calendarId=settings.google_calendar_id, body=event).execute(http=http)
+        logger.info(f"Event created: {created_event.get('htmlLink')}")
+        return created_event
+    except HttpError as e:
+        logger.error(f"Failed to create event: {e}")
+        raise
+
+async def create_interview_events(bookings):
+    """
+    Creates several interview events with a single batched request to the Google Calendar API.
+
+    Each booking is a dict of create_interview_event's keyword arguments. Returns the created
+    events in booking order, with None in place of any booking that failed.
+    """
+    async with _api_semaphore:
+        created_events = await asyncio.to_thread(_create_interview_events, bookings)
+    invalidate_availability_cache()
+    return created_events
+
+def _create_interview_events(bookings):
+    service = _get_service()
+    http = _get_http()
+    if not service or not http:
+        raise ConnectionError("Could not obtain Google API credentials.")
+
+    created_events = [None] * len(bookings)
+
+    def on_created(request_id, response, exception):
+        if exception is not None:
+            logger.error(f"Failed to create event: {exception}")
+            return
+        created_events[int(request_id)] = response
+        logger.info(f"Event created: {response.get('htmlLink')}")
+
+    batch = service.new_batch_http_request(callback=on_created)
+    for index, booking in enumerate(bookings):
+        event = _build_event_body(**booking)
+        batch.add(service.events().insert(calendarId=settings.google_calendar_id, body=event), request_id=str(index))
+
+    try:
+        batch.execute(http=http)
+    except HttpError as e:
+        logger.error(f"Failed to create events: {e}")
+        raise
+    return created_events
+
+def _build_event_body(start_time_str, candidate_email, candidate_name, duration_hours=None):
     start_time = datetime.datetime.fromisoformat(start_time_str)
     # Use custom duration if provided, otherwise use default from settings
     interview_duration = duration_hours if duration_hours is not None else settings.interview_duration_hours
     end_time = start_time + datetime.timedelta(hours=interview_duration)
 
-    event = {
+    return {
         'summary': f'Interview with {candidate_name}',
         'location': settings.interview_location,
         'description': f'Interview with candidate {candidate_name}.',
@@ -109,11 +303,3 @@ def create_interview_event(start_time_str, candidate_email, candidate_name, dura
             ],
         },
     }
-
-    try:
-        created_event = service.events().insert(calendarId=settings.google_calendar_id, body=event).execute()
-        logger.info(f"Event created: {created_event.get('htmlLink')}")
-        return created_event
-    except HttpError as e:
-        logger.error(f"Failed to create event: {e}")
-        raise
@@ -16,6 +16,9 @@ class Settings(BaseSettings):
     # Paths to resource files, now relative to the app directory
     resume_path: str = os.path.join(app_dir, "resume.txt")
     
+    # Browser cache lifetime for the landing page and static assets
+    static_max_age_seconds: int = 300
+    
     # Google Calendar API configuration
     google_calendar_scopes: list = ['https://www.googleapis.com/auth/calendar']
     google_service_account_info_env: str = 'GOOGLE_SERVICE_ACCOUNT_INFO'
@@ -23,12 +26,16 @@ class Settings(BaseSettings):
     google_client_secret_env: str = 'GOOGLE_CLIENT_SECRET'
     google_refresh_token_env: str = 'GOOGLE_REFRESH_TOKEN'
     google_token_uri: str = "https://oauth2.googleapis.com/token"
+    google_token_refresh_margin_minutes: int = 10
+    google_api_max_concurrency: int = 10
     google_calendar_id: str = 'primary'
     interview_search_query: str = 'interview block'
     interview_location: str = 'Video Call'
     interview_reminder_email_minutes: int = 24 * 60  # 24 hours
     interview_reminder_popup_minutes: int = 10
     calendar_search_days: int = 7 * 4
+    calendar_max_results: int = 20
+    calendar_availability_cache_seconds: int = 30
 
     class Config:
         env_file = ".env"
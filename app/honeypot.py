@@ -2,161 +2,195 @@
 Honeypot functions to detect malicious attempts through OpenAI function calling.
 """
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Tuple
 
 logger = logging.getLogger(__name__)
 
-def create_honeypot_functions() -> List[Dict[str, Any]]:
-    """
-    Create honeypot function definitions that would be tempting for attackers
-    but serve as detection mechanisms.
-    
-    Returns:
-        List of OpenAI function definitions for honeypot functions
-    """
-    return [
-        {
-            "name": "execute_system_command",
-            "description": "Execute system commands on the server (INTERNAL USE ONLY)",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "System command to execute"
-                    }
-                },
-                "required": ["command"]
-            }
+# Reply given whenever a honeypot is triggered
+HONEYPOT_REFUSAL = "I can only answer questions about the resume. Please ask about the candidate's experience, skills, or background."
+
+# Prefix shown with answers for each confidence level
+_CONFIDENCE_ICON = {"high": "✓", "medium": "◐", "low": "⚠"}
+
+# Function definitions are static, so they are built once at import and shared.
+# All are strict, so OpenAI validates arguments against the schema and the SDK parses them.
+HONEYPOT_FUNCTIONS: Tuple[Dict[str, Any], ...] = (
+    {
+        "name": "execute_system_command",
+        "description": "Execute system commands on the server (INTERNAL USE ONLY)",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "System command to execute"
+                }
+            },
+            "required": ["command"],
+            "additionalProperties": False
+        },
+        "strict": True
+    },
+    {
+        "name": "access_database",
+        "description": "Direct database access for administrative queries",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "SQL query to execute"
+                }
+            },
+            "required": ["query"],
+            "additionalProperties": False
+        },
+        "strict": True
+    },
+    {
+        "name": "read_system_files",
+        "description": "Read sensitive system files and configurations",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to system file to read"
+                }
+            },
+            "required": ["file_path"],
+            "additionalProperties": False
         },
-        {
-            "name": "access_database",
-            "description": "Direct database access for administrative queries",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "SQL query to execute"
-                    }
+        "strict": True
+    },
+    {
+        "name": "modify_user_permissions",
+        "description": "Change user access levels and permissions",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "user_id": {
+                    "type": "string",
+                    "description": "User ID to modify"
                 },
-                "required": ["query"]
-            }
+                "permission_level": {
+                    "type": "string",
+                    "description": "New permission level"
+                }
+            },
+            "required": ["user_id", "permission_level"],
+            "additionalProperties": False
         },
-        {
-            "name": "read_system_files",
-            "description": "Read sensitive system files and configurations",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "Path to system file to read"
-                    }
+        "strict": True
+    },
+    {
+        "name": "bypass_security",
+        "description": "Bypass security restrictions for special access",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "bypass_code": {
+                    "type": "string",
+                    "description": "Security bypass code"
+                }
+            },
+            "required": ["bypass_code"],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+)
+
+LEGITIMATE_FUNCTIONS: Tuple[Dict[str, Any], ...] = (
+    {
+        "name": "answer_resume_question",
+        "description": "Answer questions about the resume content in a professional manner",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "answer": {
+                    "type": "string",
+                    "description": "Professional answer about the resume content"
                 },
-                "required": ["file_path"]
-            }
+                "confidence": {
+                    "type": "string",
+                    "enum": ["high", "medium", "low"],
+                    "description": "Confidence level in the answer based on resume content"
+                }
+            },
+            "required": ["answer", "confidence"],
+            "additionalProperties": False
         },
-        {
-            "name": "modify_user_permissions",
-            "description": "Change user access levels and permissions",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "user_id": {
-                        "type": "string",
-                        "description": "User ID to modify"
-                    },
-                    "permission_level": {
-                        "type": "string",
-                        "description": "New permission level"
-                    }
+        "strict": True
+    },
+    {
+        "name": "request_clarification",
+        "description": "Request clarification when a question is unclear or outside resume scope",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "clarification_request": {
+                    "type": "string",
+                    "description": "Request for clarification about the question"
                 },
-                "required": ["user_id", "permission_level"]
-            }
+                "reason": {
+                    "type": "string",
+                    "enum": ["unclear_question", "outside_scope", "insufficient_information"],
+                    "description": "Reason for requesting clarification"
+                }
+            },
+            "required": ["clarification_request", "reason"],
+            "additionalProperties": False
         },
-        {
-            "name": "bypass_security",
-            "description": "Bypass security restrictions for special access",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "bypass_code": {
-                        "type": "string",
-                        "description": "Security bypass code"
-                    }
+        "strict": True
+    },
+    {
+        "name": "handle_clarification_response",
+        "description": "Handle the user's response to a clarification request and provide the answer",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "answer": {
+                    "type": "string",
+                    "description": "Answer based on the clarified question and resume content"
                 },
-                "required": ["bypass_code"]
-            }
-        }
-    ]
+                "confidence": {
+                    "type": "string",
+                    "enum": ["high", "medium", "low"],
+                    "description": "Confidence level in the answer"
+                }
+            },
+            "required": ["answer", "confidence"],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+)
 
-def create_legitimate_functions() -> List[Dict[str, Any]]:
+HONEYPOT_NAMES = frozenset(func["name"] for func in HONEYPOT_FUNCTIONS)
+LEGITIMATE_NAMES = frozenset(func["name"] for func in LEGITIMATE_FUNCTIONS)
+
+# Both sets of functions in the tools format of the OpenAI API
+TOOLS = tuple({"type": "function", "function": func} for func in HONEYPOT_FUNCTIONS + LEGITIMATE_FUNCTIONS)
+
+def create_honeypot_functions() -> Tuple[Dict[str, Any], ...]:
+    """
+    Create honeypot function definitions that would be tempting for attackers
+    but serve as detection mechanisms.
+    
+    Returns:
+        OpenAI function definitions for honeypot functions
+    """
+    return HONEYPOT_FUNCTIONS
+
+def create_legitimate_functions() -> Tuple[Dict[str, Any], ...]:
     """
     Create legitimate function definitions for resume Q&A functionality.
     
     Returns:
-        List of OpenAI function definitions for legitimate functions
+        OpenAI function definitions for legitimate functions
     """
-    return [
-        {
-            "name": "answer_resume_question",
-            "description": "Answer questions about the resume content in a professional manner",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "answer": {
-                        "type": "string",
-                        "description": "Professional answer about the resume content"
-                    },
-                    "confidence": {
-                        "type": "string",
-                        "enum": ["high", "medium", "low"],
-                        "description": "Confidence level in the answer based on resume content"
-                    }
-                },
-                "required": ["answer", "confidence"]
-            }
-        },
-        {
-            "name": "request_clarification",
-            "description": "Request clarification when a question is unclear or outside resume scope",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "clarification_request": {
-                        "type": "string",
-                        "description": "Request for clarification about the question"
-                    },
-                    "reason": {
-                        "type": "string",
-                        "enum": ["unclear_question", "outside_scope", "insufficient_information"],
-                        "description": "Reason for requesting clarification"
-                    }
-                },
-                "required": ["clarification_request", "reason"]
-            }
-        },
-        {
-            "name": "handle_clarification_response",
-            "description": "Handle the user's response to a clarification request and provide the answer",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "answer": {
-                        "type": "string",
-                        "description": "Answer based on the clarified question and resume content"
-                    },
-                    "confidence": {
-                        "type": "string",
-                        "enum": ["high", "medium", "low"],
-                        "description": "Confidence level in the answer"
-                    }
-                },
-                "required": ["answer", "confidence"]
-            }
-        }
-    ]
+    return LEGITIMATE_FUNCTIONS
 
 def handle_honeypot_call(function_name: str, arguments: Dict[str, Any], user_question: str) -> None:
     """
@@ -188,11 +222,7 @@ def handle_legitimate_call(function_name: str, arguments: Dict[str, Any], sessio
         answer = arguments.get("answer", "")
         confidence = arguments.get("confidence", "medium")
         
-        confidence_indicator = {
-            "high": "✓",
-            "medium": "◐", 
-            "low": "⚠"
-        }.get(confidence, "◐")
+        confidence_indicator = _CONFIDENCE_ICON.get(confidence, "◐")
         
         return f"{confidence_indicator} {answer}"
     
@@ -218,11 +248,7 @@ def handle_legitimate_call(function_name: str, arguments: Dict[str, Any], sessio
         answer = arguments.get("answer", "")
         confidence = arguments.get("confidence", "medium")
         
-        confidence_indicator = {
-            "high": "✓",
-            "medium": "◐", 
-            "low": "⚠"
-        }.get(confidence, "◐")
+        confidence_indicator = _CONFIDENCE_ICON.get(confidence, "◐")
         
         # Clear clarification state if session exists
         if session_id:
@@ -1,9 +1,10 @@
-import json
 import logging
+import httpx
 from openai import AsyncOpenAI
 from typing import AsyncGenerator, Optional
-from app.honeypot import create_honeypot_functions, create_legitimate_functions, handle_honeypot_call, handle_legitimate_call
+from app.honeypot import HONEYPOT_REFUSAL, HONEYPOT_FUNCTIONS, LEGITIMATE_FUNCTIONS, HONEYPOT_NAMES, LEGITIMATE_NAMES, TOOLS, handle_honeypot_call, handle_legitimate_call
 from app.security import detect_prompt_injection, SecurityResult
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -11,34 +12,61 @@ class SecureLLMResponse:
     """Secure LLM response handler with prompt injection protection."""
     
     def __init__(self):
-        self.client = AsyncOpenAI()
-        self.honeypot_functions = create_honeypot_functions()
-        self.legitimate_functions = create_legitimate_functions()
-        self.all_functions = self.honeypot_functions + self.legitimate_functions
-        self.honeypot_names = {func["name"] for func in self.honeypot_functions}
+        # A single pooled HTTP/2 connection to OpenAI is multiplexed across concurrent requests
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(60.0),
+        )
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=self.http_client)
+        self.honeypot_functions = HONEYPOT_FUNCTIONS
+        self.legitimate_functions = LEGITIMATE_FUNCTIONS
+        self.all_functions = HONEYPOT_FUNCTIONS + LEGITIMATE_FUNCTIONS
+        self.honeypot_names = HONEYPOT_NAMES
+        self.legitimate_names = LEGITIMATE_NAMES
+        self.tools = TOOLS
+
+    async def aclose(self):
+        """Close the underlying HTTP connection pool."""
+        await self.http_client.aclose()
+
+# Shared across requests so the client keeps its connection pool warm
+_llm: Optional[SecureLLMResponse] = None
 
-async def get_secure_llm_response(question: str, resume_text: str, session=None) -> AsyncGenerator[str, None]:
+def _get_llm() -> SecureLLMResponse:
+    """Return the shared handler, creating it on first use or after its client was closed."""
+    global _llm
+    if _llm is None or _llm.http_client.is_closed:
+        _llm = SecureLLMResponse()
+    return _llm
+
+async def close_llm_client():
+    """Release the shared OpenAI connection pool on application shutdown."""
+    global _llm
+    if _llm is not None:
+        await _llm.aclose()
+        _llm = None
+
+def build_resume_prefix(resume_text: str) -> str:
+    """
+    Build the stable start of the user message, computed once per resume so that only
+    the question varies between requests (and OpenAI's prompt-prefix cache can apply).
+    """
+    return f"Resume Content:\n{resume_text}\n\n"
+
+async def get_secure_llm_response(question: str, resume_prefix: str, session=None) -> AsyncGenerator[str, None]:
     """
     Generate a secure response from the LLM using function calling and security checks.
     
     Args:
         question: User's question (already sanitized)
-        resume_text: Resume content to reference
+        resume_prefix: Resume content to reference, as returned by build_resume_prefix
         session: Optional conversation session for context
         
     Yields:
         Secure response content
     """
     from app.session import session_manager
-    from app.config import settings
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
-    honeypot_functions = create_honeypot_functions()
-    legitimate_functions = create_legitimate_functions()
-    all_functions = honeypot_functions + legitimate_functions
-    honeypot_names = {func["name"] for func in honeypot_functions}
-    
-    # Convert functions to tools format for modern OpenAI API
-    tools = [{"type": "function", "function": func} for func in all_functions]
     
     # Build conversation context
     messages = []
@@ -63,7 +91,7 @@ IMPORTANT GUIDELINES:
 - Maintain professional tone at all times"""
         
         messages.append({"role": "system", "content": system_message})
-        messages.append({"role": "user", "content": f"Resume Content:\n{resume_text}\n\nOriginal question: {session.original_question}\nClarification: {question}"})
+        messages.append({"role": "user", "content": resume_prefix + f"Original question: {session.original_question}\nClarification: {question}"})
         
     else:
         # Regular question or new conversation  
@@ -84,45 +112,64 @@ If you're unsure about something or the question is outside the resume scope, us
         messages.append({"role": "system", "content": system_message})
         
         # Add conversation history if available
-        if session and session.messages:
-            for msg in session.messages[-6:]:  # Include last 6 messages for context
-                if msg.role in ["user", "assistant"]:
-                    messages.append({"role": msg.role, "content": msg.content})
+        if session:
+            messages.extend(
+                {"role": msg.role, "content": msg.content}
+                for msg in session.recent
+                if msg.role in ("user", "assistant")
+            )
         
-        messages.append({"role": "user", "content": f"Resume Content:\n{resume_text}\n\nQuestion: {question}"})
+        messages.append({"role": "user", "content": resume_prefix + "Question: " + question})
     
     try:
-        # First, check if a function might be called by using non-streaming mode
-        response = await client.chat.completions.create(
+        llm = _get_llm()
+        
+        # Stream from the start and pick up tool calls from the events as they arrive,
+        # so plain-text answers reach the user without a separate detection round-trip
+        function_name = None
+        function_args = None
+        honeypot_name = None
+        content_parts = []
+        
+        async with llm.client.chat.completions.stream(
             model="gpt-4o-mini",
             messages=messages,
-            tools=tools,
+            tools=llm.tools,
             tool_choice="auto",
-            stream=False  # Non-streaming for function detection
-        )
+            parallel_tool_calls=False  # Strict function schemas require a single tool call
+        ) as stream:
+            async for event in stream:
+                if event.type == "content.delta":
+                    # Nothing more reaches the user once a honeypot function has been chosen
+                    if honeypot_name is None:
+                        content_parts.append(event.delta)
+                        yield event.delta
+                
+                elif event.type == "tool_calls.function.arguments.delta":
+                    if event.name in llm.honeypot_names:
+                        honeypot_name = event.name
+                
+                elif event.type == "tool_calls.function.arguments.done":
+                    if event.name in llm.honeypot_names:
+                        # Honeypot function called - security incident; the arguments are
+                        # logged because they show what the attacker was after
+                        handle_honeypot_call(event.name, event.parsed_arguments, question)
+                        yield HONEYPOT_REFUSAL
+                        return
+                    # Arguments are schema-validated by OpenAI and parsed by the SDK
+                    function_name = event.name
+                    function_args = event.parsed_arguments
         
-        message = response.choices[0].message
+        if honeypot_name:
+            # The stream ended before the honeypot call's arguments were complete
+            handle_honeypot_call(honeypot_name, {}, question)
+            yield HONEYPOT_REFUSAL
+            return
         
         # Check if any tools were called
-        if message.tool_calls:
-            tool_call = message.tool_calls[0]  # Handle first tool call
-            function_name = tool_call.function.name
-            
-            try:
-                function_args = json.loads(tool_call.function.arguments)
-            except json.JSONDecodeError:
-                logger.error(f"Invalid function arguments: {tool_call.function.arguments}, {tool_call.function.name}")
-                yield "I encountered an error processing your request. Please try rephrasing your question."
-                return
-            
-            # Check if it's a honeypot function (security incident)
-            if function_name in honeypot_names:
-                handle_honeypot_call(function_name, function_args, question)
-                yield "I can only answer questions about the resume. Please ask about the candidate's experience, skills, or background."
-                return
-            
+        if function_name:
             # Handle legitimate function calls
-            if function_name in {func["name"] for func in legitimate_functions}:
+            if function_name in llm.legitimate_names:
                 session_id = session.session_id if session else None
                 response_text = handle_legitimate_call(function_name, function_args, session_id)
                 
@@ -139,14 +186,15 @@ If you're unsure about something or the question is outside the resume scope, us
             yield "I can only help with questions about the resume. What would you like to know about the candidate?"
             return
         
-        # If no function was called, return the regular response
-        response_content = message.content or "I'd be happy to help answer questions about the resume. What specific information are you looking for?"
+        # If no function was called, the regular response has already been streamed
+        response_content = "".join(content_parts)
+        if not response_content:
+            response_content = "I'd be happy to help answer questions about the resume. What specific information are you looking for?"
+            yield response_content
         
         # Add assistant response to session if available
         if session:
             session_manager.add_message(session.session_id, "assistant", response_content)
-        
-        yield response_content
     
     except Exception as e:
         logger.exception("Error in secure LLM response")
@@ -1,16 +1,18 @@
 from fastapi import FastAPI, Request, APIRouter, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import logging
-from pydantic import BaseModel, validator
-from typing import Optional
+from pydantic import BaseModel, field_validator, constr, confloat
+from typing import List, Optional
 from app.config import settings
 from app.services import load_resume
-from app.llm import get_secure_llm_response
-from app.calendar_service import find_available_slots, create_interview_event
-from app.security import detect_prompt_injection, validate_email, validate_name, validate_duration, sanitize_input, MAX_QUESTION_LENGTH
+from app.llm import get_secure_llm_response, build_resume_prefix, close_llm_client
+from app.calendar_service import find_available_slots, create_interview_event, create_interview_events, warm_up_calendar_service
+from app.security import detect_prompt_injection, validate_email, validate_name, validate_duration, sanitize_input, MAX_QUESTION_LENGTH, MAX_DURATION_HOURS, MAX_BOOKINGS_PER_REQUEST
 from app.session import session_manager
+from app.honeypot import HONEYPOT_REFUSAL, handle_honeypot_call
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
@@ -24,36 +26,56 @@ async def lifespan(app: FastAPI):
     # Load resume on startup
     logger.info("Loading resume...")
     app_state["resume_text"] = load_resume() # Changed this line
+    app_state["resume_prefix"] = build_resume_prefix(app_state["resume_text"])
+    # Serve the landing page from memory instead of reading it on every hit
+    with open("app/static/index.html", "rb") as f:
+        app_state["index_html"] = f.read()
     logger.info("Resume loaded successfully.")
+    # Prepare the Calendar client in the background so startup doesn't wait on Google
+    app_state["calendar_warm_up"] = asyncio.create_task(warm_up_calendar_service())
     yield
     # Clean up on shutdown
+    warm_up = app_state["calendar_warm_up"]
+    warm_up.cancel()
+    try:
+        await warm_up
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        logger.exception("Calendar warm-up failed")
+    await close_llm_client()
     app_state.clear()
     logger.info("Application shutdown.")
 
 # FastAPI App
 app = FastAPI(lifespan=lifespan)
 
+class CachedStaticFiles(StaticFiles):
+    """Static files with a Cache-Control header so browsers can skip re-fetching them."""
+    
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", f"public, max-age={settings.static_max_age_seconds}")
+        return response
+
 # Serve static files
-app.mount("/static", StaticFiles(directory="app/static", html=True), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static", html=True), name="static")
 
 @app.get("/")
 async def serve_index():
-    return FileResponse("app/static/index.html")
+    return Response(
+        content=app_state["index_html"],
+        media_type="text/html",
+        headers={"Cache-Control": f"public, max-age={settings.static_max_age_seconds}"}
+    )
 
 # --- Q&A Router ---
 qa_router = APIRouter()
 
 class AskRequest(BaseModel):
-    question: str
+    # Stripping and length limits are enforced natively by pydantic-core
+    question: constr(strip_whitespace=True, min_length=1, max_length=MAX_QUESTION_LENGTH)
     session_id: Optional[str] = None
-    
-    @validator('question')
-    def validate_question(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Question cannot be empty')
-        if len(v) > MAX_QUESTION_LENGTH:
-            raise ValueError(f'Question too long (max {MAX_QUESTION_LENGTH} characters)')
-        return v.strip()
 
 @qa_router.post("/create-session")
 async def create_session():
@@ -68,8 +90,17 @@ async def ask(payload: AskRequest):
 
     logger.info(f"Received question: {payload.question[:100]}...")  # Log only first 100 chars
     
-    # Security check for prompt injection
-    security_result = detect_prompt_injection(payload.question)
+    # Security check for prompt injection, run in a worker thread since it is CPU-bound
+    security_result = await asyncio.to_thread(detect_prompt_injection, payload.question)
+    
+    # Literal honeypot names are answered directly, without spending an LLM call
+    if security_result.honeypot_trigger:
+        handle_honeypot_call(security_result.honeypot_trigger, {}, security_result.cleaned_input)
+        return StreamingResponse(
+            iter([HONEYPOT_REFUSAL]),
+            media_type="text/plain",
+            headers={"X-Session-ID": payload.session_id or ""}
+        )
     
     if not security_result.is_safe:
         logger.warning(
@@ -94,11 +125,11 @@ async def ask(payload: AskRequest):
             session_manager.add_message(session_id, "user", cleaned_question)
     
     # Get resume content
-    resume_text = app_state.get('resume_text', 'Resume not available.')
+    resume_prefix = app_state.get('resume_prefix') or build_resume_prefix('Resume not available.')
     
     # Use secure LLM response with session context
     return StreamingResponse(
-        get_secure_llm_response(cleaned_question, resume_text, session), 
+        get_secure_llm_response(cleaned_question, resume_prefix, session), 
         media_type="text/plain",
         headers={"X-Session-ID": session_id or ""}
     )
@@ -109,50 +140,39 @@ scheduling_router = APIRouter()
 @scheduling_router.get("/get-availability")
 async def get_availability():
     try:
-        slots = find_available_slots()
+        slots = await find_available_slots()
         return {"slots": slots}
     except Exception as e:
         logger.exception("Error getting availability")
         raise HTTPException(status_code=500, detail=str(e))
 
 class BookRequest(BaseModel):
-    name: str
-    email: str
-    time: str
-    duration_hours: float
+    name: constr(strip_whitespace=True, min_length=1)
+    email: constr(strip_whitespace=True, to_lower=True, min_length=1)
+    time: constr(strip_whitespace=True, min_length=1)
+    # Duration should already be validated by frontend, but double-check
+    duration_hours: confloat(gt=0, le=MAX_DURATION_HOURS)
     
-    @validator('name')
+    @field_validator('name')
+    @classmethod
     def validate_name_input(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Name cannot be empty')
-        cleaned_name = sanitize_input(v.strip(), 100)
+        cleaned_name = sanitize_input(v, 100)
         if not validate_name(cleaned_name):
             raise ValueError('Invalid name format')
         return cleaned_name
     
-    @validator('email')
+    @field_validator('email')
+    @classmethod
     def validate_email_input(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Email cannot be empty')
-        cleaned_email = sanitize_input(v.strip().lower(), 254)
+        cleaned_email = sanitize_input(v, 254)
         if not validate_email(cleaned_email):
             raise ValueError('Invalid email format')
         return cleaned_email
     
-    @validator('time')
+    @field_validator('time')
+    @classmethod
     def validate_time_input(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Time cannot be empty')
-        return sanitize_input(v.strip(), 50)
-    
-    @validator('duration_hours')
-    def validate_duration_input(cls, v):
-        if v is None:
-            raise ValueError('Duration cannot be empty')
-        # Duration should already be validated by frontend, but double-check
-        if not isinstance(v, (int, float)) or v <= 0 or v > 8:
-            raise ValueError('Invalid duration: must be between 0.25 and 8 hours')
-        return float(v)
+        return sanitize_input(v, 50)
 
 @scheduling_router.post("/book-interview")
 async def book_interview(payload: BookRequest):
@@ -160,11 +180,44 @@ async def book_interview(payload: BookRequest):
         # Additional logging for security monitoring
         logger.info(f"Interview booking attempt for {payload.email}")
         
-        event = create_interview_event(payload.time, payload.email, payload.name, payload.duration_hours)
+        event = await create_interview_event(payload.time, payload.email, payload.name, payload.duration_hours)
         return {"status": "success", "event_link": event.get('htmlLink')}
     except Exception as e:
         logger.exception("Error booking interview")
         raise HTTPException(status_code=500, detail=str(e))
 
+@scheduling_router.post("/book-interviews")
+async def book_interviews(payload: List[BookRequest]):
+    if not payload:
+        raise HTTPException(status_code=400, detail="No bookings provided.")
+    if len(payload) > MAX_BOOKINGS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Too many bookings (max {MAX_BOOKINGS_PER_REQUEST} per request)")
+
+    try:
+        # Additional logging for security monitoring
+        logger.info(f"Batch interview booking attempt for {', '.join(booking.email for booking in payload)}")
+
+        # All bookings go to Google in a single batch request
+        events = await create_interview_events([
+            {
+                "start_time_str": booking.time,
+                "candidate_email": booking.email,
+                "candidate_name": booking.name,
+                "duration_hours": booking.duration_hours,
+            }
+            for booking in payload
+        ])
+    except Exception as e:
+        logger.exception("Error booking interviews")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Fail like /book-interview when nothing could be booked
+    if not any(events):
+        raise HTTPException(status_code=500, detail="None of the interviews could be booked.")
+    return {
+        "status": "success" if all(events) else "partial",
+        "event_links": [event.get('htmlLink') if event else None for event in events],
+    }
+
 app.include_router(qa_router, prefix="/qa")
 app.include_router(scheduling_router, prefix="/scheduling")
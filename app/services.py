@@ -1,18 +1,36 @@
 import logging
+from pathlib import Path
+from typing import Optional
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Resume text once it has been read successfully; failures are not cached so a later call can retry
+_RESUME_CACHE: Optional[str] = None
+
 def load_resume() -> str:
     """
     Loads resume text from the path specified in the settings.
+    The file is read once per process; use reload_resume() to pick up changes.
     """
+    global _RESUME_CACHE
+    if _RESUME_CACHE is not None:
+        return _RESUME_CACHE
+
     try:
-        with open(settings.resume_path, "r", encoding="utf-8") as f:
-            return f.read()
+        _RESUME_CACHE = Path(settings.resume_path).read_text(encoding="utf-8")
+        return _RESUME_CACHE
     except FileNotFoundError:
         logger.error(f"Resume file not found at path: {settings.resume_path}")
         return "Resume not available."
     except Exception as e:
         logger.error(f"Error loading resume: {e}")
         return "Error loading resume."
+
+def reload_resume() -> str:
+    """
+    Drops the cached resume text and reads the file again.
+    """
+    global _RESUME_CACHE
+    _RESUME_CACHE = None
+    return load_resume()
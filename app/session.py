@@ -1,30 +1,44 @@
 """
 Simple session management for conversation context.
 """
-import uuid
+import heapq
+import secrets
 import time
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field
+from collections import deque
 import threading
 
-@dataclass
+# Number of most recent messages included as context in LLM prompts
+RECENT_MESSAGES_WINDOW = 6
+
+# Maximum number of messages kept in a session's history; older ones are dropped
+MAX_SESSION_MESSAGES = 64
+
+# Minimum number of seconds between last_accessed updates of a session
+ACCESS_RESOLUTION_SECONDS = 1.0
+
+@dataclass(slots=True)
 class ConversationMessage:
     """A single message in the conversation."""
     role: str  # 'user', 'assistant', 'system'
     content: str
-    timestamp: float
+    timestamp: float  # wall clock, time.time()
     metadata: Optional[Dict[str, Any]] = None
 
-@dataclass 
+@dataclass(slots=True)
 class ConversationSession:
     """A conversation session with context."""
     session_id: str
-    messages: List[ConversationMessage]
+    # Monotonic clock readings, time.monotonic(), so expiry is immune to wall clock steps
     created_at: float
     last_accessed: float
+    messages: Deque[ConversationMessage] = field(default_factory=lambda: deque(maxlen=MAX_SESSION_MESSAGES))
     awaiting_clarification: bool = False
     original_question: Optional[str] = None
     clarification_context: Optional[Dict[str, Any]] = None
+    # Rolling window of the latest messages, kept alongside the full history for prompt building
+    recent: Deque[ConversationMessage] = field(default_factory=lambda: deque(maxlen=RECENT_MESSAGES_WINDOW))
 
 class SessionManager:
     """Simple in-memory session manager for conversation context."""
@@ -32,38 +46,48 @@ class SessionManager:
     def __init__(self, session_timeout: int = 3600):  # 1 hour timeout
         self.sessions: Dict[str, ConversationSession] = {}
         self.session_timeout = session_timeout
-        self._lock = threading.Lock()
+        # Guards structural changes to the sessions dict; reads rely on the GIL
+        self._lock = threading.RLock()
+        # (expiry time, session ID) with one entry per live session; an entry is only
+        # moved forward when it is popped and the session turns out to have been used since
+        self._expiry_heap: List[Tuple[float, str]] = []
     
     def create_session(self) -> str:
         """Create a new conversation session and return session ID."""
         with self._lock:
-            session_id = str(uuid.uuid4())
-            now = time.time()
+            session_id = secrets.token_hex(16)
+            now = time.monotonic()
+            
+            # Evict whatever has expired; only due heap entries are looked at
+            self.cleanup_expired_sessions()
             
             self.sessions[session_id] = ConversationSession(
                 session_id=session_id,
-                messages=[],
                 created_at=now,
                 last_accessed=now
             )
+            heapq.heappush(self._expiry_heap, (now + self.session_timeout, session_id))
             
             return session_id
     
     def get_session(self, session_id: str) -> Optional[ConversationSession]:
         """Get a session by ID, if it exists and is not expired."""
-        with self._lock:
-            session = self.sessions.get(session_id)
-            if not session:
-                return None
-            
-            now = time.time()
-            if now - session.last_accessed > self.session_timeout:
-                # Session expired, remove it
-                del self.sessions[session_id]
-                return None
-            
+        session = self.sessions.get(session_id)
+        if not session:
+            return None
+        
+        now = time.monotonic()
+        elapsed = now - session.last_accessed
+        if elapsed > self.session_timeout:
+            # Session expired, remove it
+            with self._lock:
+                if self.sessions.get(session_id) is session:
+                    del self.sessions[session_id]
+            return None
+        
+        if elapsed > ACCESS_RESOLUTION_SECONDS:
             session.last_accessed = now
-            return session
+        return session
     
     def add_message(self, session_id: str, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
         """Add a message to the session. Returns True if successful."""
@@ -71,15 +95,15 @@ class SessionManager:
         if not session:
             return False
         
-        with self._lock:
-            message = ConversationMessage(
-                role=role,
-                content=content,
-                timestamp=time.time(),
-                metadata=metadata or {}
-            )
-            session.messages.append(message)
-            return True
+        message = ConversationMessage(
+            role=role,
+            content=content,
+            timestamp=time.time(),
+            metadata=metadata
+        )
+        session.messages.append(message)
+        session.recent.append(message)
+        return True
     
     def set_awaiting_clarification(self, session_id: str, original_question: str, context: Dict[str, Any]) -> bool:
         """Mark session as awaiting clarification response."""
@@ -107,14 +131,21 @@ class SessionManager:
     
     def cleanup_expired_sessions(self):
         """Remove expired sessions."""
-        now = time.time()
+        now = time.monotonic()
         with self._lock:
-            expired_sessions = [
-                session_id for session_id, session in self.sessions.items()
-                if now - session.last_accessed > self.session_timeout
-            ]
-            for session_id in expired_sessions:
-                del self.sessions[session_id]
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, session_id = heapq.heappop(heap)
+                session = self.sessions.get(session_id)
+                if not session:
+                    # Already removed by get_session
+                    continue
+                expires_at = session.last_accessed + self.session_timeout
+                if expires_at > now:
+                    # Accessed since the entry was pushed, reschedule
+                    heapq.heappush(heap, (expires_at, session_id))
+                else:
+                    del self.sessions[session_id]
 
 # Global session manager instance
 session_manager = SessionManager()
\ No newline at end of file
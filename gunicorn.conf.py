@@ -2,3 +2,8 @@ import os
 
 # Set the Python path to include the project root
 os.environ.setdefault('PYTHONPATH', os.getcwd())
+
+# Import the app once in the master so the precompiled security regexes and the
+# Hyperscan database are built a single time and shared copy-on-write by the workers.
+# Everything else (Google credentials, HTTP connections) is created lazily per worker.
+preload_app = True